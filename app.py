@@ -1,5 +1,8 @@
 import os
 import sys
+import json
+import time
+import threading
 import subprocess
 from pathlib import Path
 
@@ -15,17 +18,36 @@ def get_modules():
         "3": ("Verificar NCM's", "ncm_check.py", "csv"),
         "4": ("Gerar lista de NCM's validos", "ncm_valid_generator.py", "json"),
         "5": ("Altera formatacao de data", "date_fix.py", "csv"),
-        "6": ("Prepara p/ importacao", "table_out.py", "csv")
+        "6": ("Prepara p/ importacao", "table_out.py", "csv"),
+        "7": ("Carregar em banco SQLite", "sqlite_out.py", "csv"),
+        "8": ("Filtrar linhas novas/alteradas", "row_delta.py", "csv"),
+        "9": ("Remover linhas duplicadas", "dedup.py", "csv"),
+        "10": ("Altera formatacao de numeros", "number_fix.py", "csv"),
+        "11": ("Confirmar delta apos importacao", "row_delta_commit.py", "csv")
     }
 
-def show_menu():
+def get_menu_options(modules):
+    first_option = len(modules) + 1
+    return {
+        "jobs": str(first_option),
+        "log": str(first_option + 1),
+        "cancel": str(first_option + 2),
+        "open": str(first_option + 3),
+        "exit": str(first_option + 4),
+    }
+
+def show_menu(pending_jobs=0):
     modules = get_modules()
+    options = get_menu_options(modules)
     print("\nModulos disponiveis:")
     print("-" * 30)
     for key, (name, script, file_type) in modules.items():
         print(f"{key}. {name} ({file_type.upper()})")
-    print("7. Abrir pasta de saida")
-    print("8. Sair")
+    print(f"{options['jobs']}. Fila de jobs ({pending_jobs} pendente(s))")
+    print(f"{options['log']}. Ver log de job")
+    print(f"{options['cancel']}. Cancelar job")
+    print(f"{options['open']}. Abrir pasta de saida")
+    print(f"{options['exit']}. Sair")
     print("-" * 30)
 
 def get_file_input(file_type):
@@ -61,35 +83,293 @@ def clean_file_path(file_path):
     
     return file_path
 
-def run_module(module_name, script_name, file_path):
-    print(f"\nExecutando {module_name}...")
-    print("-" * 40)
-    try:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        script_path = os.path.join(base_dir, "modules", script_name)
-        if not os.path.exists(script_path):
-            print(f"Modulo {script_name} nao encontrado")
-            return
+JOB_TIMEOUT = 300
+DEFAULT_WORKERS = 2
+
+QUEUED = "na fila"
+RUNNING = "executando"
+DONE = "concluido"
+FAILED = "falhou"
+CANCELLED = "cancelado"
+
+
+class Job:
+    def __init__(self, job_id, module_name, script_name, file_path, depends_on):
+        self.id = job_id
+        self.module_name = module_name
+        self.script_name = script_name
+        self.file_path = file_path
+        self.depends_on = depends_on
+        self.status = QUEUED
+        self.detail = ""
+        self.started_at = None
+        self.finished_at = None
+        self.estimated_seconds = None
+        self.process = None
+        self.cancel_requested = False
+        self.log_path = None
+
+    def elapsed(self):
+        if self.started_at is None:
+            return 0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def file_size(self):
+        try:
+            return os.path.getsize(self.file_path)
+        except OSError:
+            return 0
+
+
+class JobScheduler:
+    """Runs module jobs in background threads, respecting dependencies.
+
+    Job durations are estimated from the throughput (bytes/s) of previous
+    runs of the same script, which is kept in files/logs/throughput.json.
+    """
+
+    def __init__(self, base_dir, workers=DEFAULT_WORKERS):
+        self.base_dir = base_dir
+        self.logs_dir = os.path.join(base_dir, "files", "logs")
+        self.throughput_path = os.path.join(self.logs_dir, "throughput.json")
+        self.jobs = []
+        self.condition = threading.Condition()
+        self.stopping = False
+        self.throughput = self._load_throughput()
+        self.threads = [
+            threading.Thread(target=self._worker, daemon=True) for _ in range(max(1, workers))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def _load_throughput(self):
+        try:
+            with open(self.throughput_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_throughput(self):
+        os.makedirs(self.logs_dir, exist_ok=True)
+        with open(self.throughput_path, 'w', encoding='utf-8') as f:
+            json.dump(self.throughput, f, indent=2)
+
+    def submit(self, module_name, script_name, file_path, depends_on=()):
+        with self.condition:
+            job = Job(len(self.jobs) + 1, module_name, script_name, file_path, list(depends_on))
+            rate = self.throughput.get(script_name)
+            if rate:
+                job.estimated_seconds = job.file_size() / rate
+            self.jobs.append(job)
+            self.condition.notify_all()
+            return job
+
+    def get(self, job_id):
+        with self.condition:
+            for job in self.jobs:
+                if job.id == job_id:
+                    return job
+        return None
+
+    def pending_jobs(self, script_name=None):
+        with self.condition:
+            return [
+                job for job in self.jobs
+                if job.status in (QUEUED, RUNNING)
+                and (script_name is None or job.script_name == script_name)
+            ]
+
+    def cancel(self, job_id):
+        with self.condition:
+            job = self.get(job_id)
+            if job is None or job.status not in (QUEUED, RUNNING):
+                return False
+            job.cancel_requested = True
+            if job.status == QUEUED:
+                job.status = CANCELLED
+                job.detail = "cancelado pelo usuario"
+            elif job.process is not None:
+                job.process.terminate()
+            self.condition.notify_all()
+            return True
+
+    def shutdown(self):
+        with self.condition:
+            self.stopping = True
+            for job in self.jobs:
+                if job.status in (QUEUED, RUNNING):
+                    self.cancel(job.id)
+            self.condition.notify_all()
+
+    def _next_runnable(self):
+        for job in self.jobs:
+            if job.status != QUEUED:
+                continue
+            dependencies = [self.get(dep_id) for dep_id in job.depends_on]
+            blocked = [dep for dep in dependencies if dep is not None and dep.status in (FAILED, CANCELLED)]
+            if blocked:
+                job.status = CANCELLED
+                job.detail = f"dependencia #{blocked[0].id} nao concluiu"
+                self.condition.notify_all()
+                continue
+            if all(dep is None or dep.status == DONE for dep in dependencies):
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                job = self._next_runnable()
+                while job is None and not self.stopping:
+                    self.condition.wait()
+                    job = self._next_runnable()
+                if job is None:
+                    return
+                job.status = RUNNING
+                job.started_at = time.time()
+            self._run(job)
+            with self.condition:
+                self.condition.notify_all()
+
+    def _run(self, job):
+        script_path = os.path.join(self.base_dir, "modules", job.script_name)
+        os.makedirs(self.logs_dir, exist_ok=True)
+        job.log_path = os.path.join(self.logs_dir, f"job_{job.id}_{os.path.splitext(job.script_name)[0]}.log")
         try:
-            rel_file_path = os.path.relpath(file_path, base_dir)
+            rel_file_path = os.path.relpath(job.file_path, self.base_dir)
         except Exception:
-            rel_file_path = file_path
-        result = subprocess.run(
-            ["python", script_path, rel_file_path],
-            cwd=base_dir,
-            text=True,
-            timeout=300
-        )
-        if result.returncode == 0:
-            print(f"{module_name} finalizado")
-        else:
-            print(f"{module_name} o processo falhou: {result.returncode}")
-    except subprocess.TimeoutExpired:
-        print(f"{module_name} encerramento forcado")
-    except KeyboardInterrupt:
-        print(f"{module_name} foi interrompido pelo usuario")
-    except Exception as e:
-        print(f"Erro de execucao {module_name}: {str(e)}")
+            rel_file_path = job.file_path
+
+        status, detail = FAILED, ""
+        try:
+            with open(job.log_path, 'w', encoding='utf-8') as log_file:
+                with self.condition:
+                    if job.cancel_requested:
+                        raise InterruptedError
+                    job.process = subprocess.Popen(
+                        ["python", script_path, rel_file_path],
+                        cwd=self.base_dir,
+                        stdin=subprocess.DEVNULL,
+                        stdout=log_file,
+                        stderr=subprocess.STDOUT,
+                        env={**os.environ, "PYTHONIOENCODING": "utf-8"},
+                        text=True
+                    )
+                try:
+                    returncode = job.process.wait(timeout=JOB_TIMEOUT)
+                except subprocess.TimeoutExpired:
+                    job.process.kill()
+                    job.process.wait()
+                    status, detail = FAILED, "encerramento forcado"
+                else:
+                    if job.cancel_requested:
+                        status, detail = CANCELLED, "cancelado pelo usuario"
+                    elif returncode == 0:
+                        status = DONE
+                    else:
+                        detail = f"o processo falhou: {returncode}"
+        except InterruptedError:
+            status, detail = CANCELLED, "cancelado pelo usuario"
+        except Exception as e:
+            detail = f"erro de execucao: {str(e)}"
+
+        with self.condition:
+            job.finished_at = time.time()
+            job.status = status
+            job.detail = detail
+            job.process = None
+            if status == DONE and job.file_size() and job.elapsed() > 0:
+                self.throughput[job.script_name] = job.file_size() / job.elapsed()
+                try:
+                    self._save_throughput()
+                except OSError:
+                    pass
+
+
+def format_seconds(seconds):
+    seconds = int(seconds)
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+def show_jobs(scheduler):
+    print("\nFila de jobs:")
+    print("-" * 78)
+    print(f"{'#':>3}  {'Modulo':<30} {'Status':<11} {'Progresso':>9} {'Tempo':>6} {'ETA':>6}")
+    print("-" * 78)
+    if not scheduler.jobs:
+        print("Nenhum job enviado")
+    for job in list(scheduler.jobs):
+        progress, eta = "", ""
+        if job.status == RUNNING:
+            if job.estimated_seconds:
+                fraction = min(job.elapsed() / job.estimated_seconds, 0.99)
+                progress = f"{fraction:.0%}"
+                eta = format_seconds(max(job.estimated_seconds - job.elapsed(), 0))
+            else:
+                progress, eta = "?", "?"
+        elif job.status == DONE:
+            progress = "100%"
+        elapsed = format_seconds(job.elapsed()) if job.started_at else ""
+        name = f"{job.module_name} ({os.path.basename(job.file_path)})"
+        print(f"{job.id:>3}  {name[:30]:<30} {job.status:<11} {progress:>9} {elapsed:>6} {eta:>6}")
+        if job.depends_on and job.status == QUEUED:
+            print(f"     aguardando: {', '.join(f'#{dep_id}' for dep_id in job.depends_on)}")
+        if job.detail:
+            print(f"     {job.detail}")
+    print("-" * 78)
+
+def read_job_id(scheduler, prompt):
+    value = input(prompt).strip().lstrip('#')
+    if not value.isdigit() or scheduler.get(int(value)) is None:
+        print("Job nao encontrado")
+        return None
+    return scheduler.get(int(value))
+
+def show_job_log(scheduler, lines=30):
+    job = read_job_id(scheduler, "Numero do job: ")
+    if job is None:
+        return
+    if not job.log_path or not os.path.exists(job.log_path):
+        print(f"Job #{job.id} ainda nao possui log ({job.status})")
+        return
+    with open(job.log_path, 'r', encoding='utf-8', errors='replace') as f:
+        content = f.readlines()
+    print(f"\nLog do job #{job.id}: {job.log_path}")
+    print("-" * 40)
+    for line in content[-lines:]:
+        print(line.rstrip())
+
+def cancel_job(scheduler):
+    job = read_job_id(scheduler, "Numero do job para cancelar: ")
+    if job is None:
+        return
+    if scheduler.cancel(job.id):
+        print(f"Job #{job.id} cancelado")
+    else:
+        print(f"Job #{job.id} ja esta {job.status}")
+
+def get_dependencies(scheduler, script_name):
+    depends_on = []
+    # ncm_check needs the valid NCM list that a queued generator job will write
+    if script_name == "ncm_check.py":
+        depends_on = [job.id for job in scheduler.pending_jobs("ncm_valid_generator.py")]
+        if depends_on:
+            print(f"Sera executado apos: {', '.join(f'#{dep_id}' for dep_id in depends_on)}")
+    if scheduler.pending_jobs():
+        value = input("Executar apos o job # (enter para nenhum): ").strip().lstrip('#')
+        if value.isdigit() and scheduler.get(int(value)) is not None:
+            depends_on.append(int(value))
+        elif value:
+            print("Job nao encontrado, sem dependencia adicional")
+    return depends_on
+
+def submit_module(scheduler, module_name, script_name, file_path):
+    script_path = os.path.join(scheduler.base_dir, "modules", script_name)
+    if not os.path.exists(script_path):
+        print(f"Modulo {script_name} nao encontrado")
+        return
+    depends_on = get_dependencies(scheduler, script_name)
+    job = scheduler.submit(module_name, script_name, file_path, depends_on)
+    print(f"Job #{job.id} ({module_name}) adicionado a fila")
 
 def open_files_folder():
     files_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "files")
@@ -113,30 +393,53 @@ def open_files_folder():
         print(f"Os arquivos estao salvos em: {files_path}")
 
 
-def main():
+def main(workers=DEFAULT_WORKERS):
     print_banner()
     modules = get_modules()
+    options = get_menu_options(modules)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    scheduler = JobScheduler(base_dir, workers)
+    print(f"Executando ate {workers} job(s) em paralelo")
     while True:
-        show_menu()
+        show_menu(len(scheduler.pending_jobs()))
         try:
-            choice = input("\nSelecione uma opcao (1-8): ").strip()
-            if choice == "8":
+            choice = input(f"\nSelecione uma opcao (1-{options['exit']}): ").strip()
+            if choice == options['exit']:
+                pending = scheduler.pending_jobs()
+                if pending:
+                    answer = input(f"{len(pending)} job(s) pendente(s) serao cancelados. Sair? (s/n): ")
+                    if answer.strip().lower() != 's':
+                        continue
                 break
-            elif choice == "7":
+            elif choice == options['jobs']:
+                show_jobs(scheduler)
+                input("\nPressione enter para continuar...")
+            elif choice == options['log']:
+                show_job_log(scheduler)
+                input("\nPressione enter para continuar...")
+            elif choice == options['cancel']:
+                cancel_job(scheduler)
+            elif choice == options['open']:
                 open_files_folder()
                 input("\nPressione enter para continuar...")
                 continue
             elif choice in modules:
                 module_name, script_name, file_type = modules[choice]
                 file_path = get_file_input(file_type)
-                run_module(module_name, script_name, file_path)
-                input("\nPressione enter para continuar...")
+                submit_module(scheduler, module_name, script_name, file_path)
             else:
-                print("Opcao invalida, escolha entre 1-8.")
+                print(f"Opcao invalida, escolha entre 1-{options['exit']}.")
         except KeyboardInterrupt:
             break
         except Exception as e:
             print(f"Error: {e}")
+    scheduler.shutdown()
 
 if __name__ == "__main__":
-    main()
+    if len(sys.argv) == 3 and sys.argv[1] == "--workers" and sys.argv[2].isdigit():
+        main(max(1, int(sys.argv[2])))
+    elif len(sys.argv) == 1:
+        main()
+    else:
+        print("Uso: python app.py [--workers N]")
+        sys.exit(1)
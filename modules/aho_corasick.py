@@ -0,0 +1,95 @@
+from collections import deque
+
+
+class Automaton:
+    """Aho-Corasick automaton for substituting many substrings in one scan.
+
+    Overlapping matches are resolved leftmost-longest: the match that starts
+    first wins, and among matches starting at the same position the longest
+    one is used.
+    """
+
+    def __init__(self, replacements):
+        self.goto = [{}]
+        self.fail = [0]
+        self.lengths = [0]
+        self.output_link = [0]
+        self.replacements = dict(replacements)
+
+        for pattern in self.replacements:
+            if pattern:
+                self._add(pattern)
+        self._build_links()
+
+    def __len__(self):
+        return len(self.replacements)
+
+    def _add(self, pattern):
+        state = 0
+        for char in pattern:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.lengths.append(0)
+                self.output_link.append(0)
+            state = next_state
+        self.lengths[state] = len(pattern)
+
+    def _build_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0)
+                self.fail[next_state] = target if target != next_state else 0
+                # Nearest state on the fail chain that ends a pattern
+                if self.lengths[self.fail[next_state]]:
+                    self.output_link[next_state] = self.fail[next_state]
+                else:
+                    self.output_link[next_state] = self.output_link[self.fail[next_state]]
+                queue.append(next_state)
+
+    def replace(self, text):
+        if not text or not self.replacements:
+            return text
+
+        goto = self.goto
+        fail = self.fail
+        lengths = self.lengths
+        output_link = self.output_link
+        longest_at = {}
+        state = 0
+
+        for position, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            match = state if lengths[state] else output_link[state]
+            while match:
+                length = lengths[match]
+                start = position - length + 1
+                if longest_at.get(start, 0) < length:
+                    longest_at[start] = length
+                match = output_link[match]
+
+        if not longest_at:
+            return text
+
+        pieces = []
+        position = 0
+        for start in sorted(longest_at):
+            if start < position:
+                continue
+            end = start + longest_at[start]
+            pieces.append(text[position:start])
+            pieces.append(self.replacements[text[start:end]])
+            position = end
+        pieces.append(text[position:])
+        return ''.join(pieces)
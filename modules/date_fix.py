@@ -3,6 +3,10 @@ import csv
 import os
 import re
 from datetime import datetime
+from memo_cache import MemoCache
+from rows import Header, iter_rows
+
+PARSE_DATE_VERSION = 1
 
 def parse_date(date_str):
     if not date_str or date_str.strip() == '':
@@ -34,7 +38,7 @@ def parse_date(date_str):
     
     return None
 
-def main(csv_path):
+def main(csv_path, use_cache=False):
     base_name = os.path.basename(csv_path)
     name_without_ext = os.path.splitext(base_name)[0]
     
@@ -53,19 +57,15 @@ def main(csv_path):
         uses_quotes = first_line.startswith('"')
         infile.seek(0)
         
-        reader = csv.DictReader(infile)
-        fieldnames = reader.fieldnames
+        reader = csv.reader(infile)
+        fieldnames = next(reader, None)
         if fieldnames is None:
             print("Error: CSV file does not contain a header row.")
             sys.exit(1)
         
-        date_columns = []
-        target_date_fields = ['emissao', 'vencimento']
-        
-        for field in fieldnames:
-            clean_field = field.strip('"').strip().lower()
-            if clean_field in target_date_fields:
-                date_columns.append(field)
+        header = Header(fieldnames)
+        date_positions = header.find_all(['emissao', 'vencimento'])
+        date_columns = [fieldnames[position] for position in date_positions]
         
         if not date_columns:
             print("No date columns found (looking for 'emissao' and/or 'vencimento').")
@@ -74,29 +74,43 @@ def main(csv_path):
         
         print(f"Found date columns: {date_columns}")
 
-        for row in reader:
+        rows = list(iter_rows(reader, len(header)))
+        parsed_dates = None
+        if use_cache:
+            values = {row[position].strip() for row in rows for position in date_positions}
+            values.discard('')
+            with MemoCache('parse_date', PARSE_DATE_VERSION) as cache:
+                parsed_dates = cache.resolve(values, parse_date)
+                print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+
+        for row in rows:
             row_has_error = False
-            fixed_row = row.copy()
-            error_row = row.copy()
+            fixed_values = []
             
-            for date_column in date_columns:
-                original_value = row.get(date_column, '').strip()
+            for position, date_column in zip(date_positions, date_columns):
+                original_value = row[position].strip()
                 
                 if original_value:
-                    parsed_date = parse_date(original_value)
+                    if parsed_dates is not None:
+                        parsed_date = parsed_dates[original_value]
+                    else:
+                        parsed_date = parse_date(original_value)
                     
                     if parsed_date is None:
                         row_has_error = True
                         has_errors = True
                         print(f"Warning: Could not parse date '{original_value}' in column '{date_column}'")
                     elif parsed_date != original_value:
-                        fixed_row[date_column] = parsed_date
+                        fixed_values.append((position, parsed_date))
                         has_modifications = True
 
+            # Error rows keep the original values, so copy before fixing in place
             if row_has_error:
-                error_rows.append(error_row)
+                error_rows.append(row.copy())
             
-            fixed_rows.append(fixed_row)
+            for position, parsed_date in fixed_values:
+                row[position] = parsed_date
+            fixed_rows.append(row)
 
     quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
 
@@ -105,14 +119,14 @@ def main(csv_path):
         return
 
     with open(fixed_path, 'w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames, quoting=quoting_style)
-        writer.writeheader()
+        writer = csv.writer(outfile, quoting=quoting_style)
+        writer.writerow(fieldnames)
         writer.writerows(fixed_rows)
 
     if has_errors:
         with open(errors_path, 'w', newline='', encoding='utf-8') as outfile:
-            writer = csv.DictWriter(outfile, fieldnames=fieldnames, quoting=quoting_style)
-            writer.writeheader()
+            writer = csv.writer(outfile, quoting=quoting_style)
+            writer.writerow(fieldnames)
             writer.writerows(error_rows)
 
     print(f"Processing complete:")
@@ -124,7 +138,7 @@ def main(csv_path):
         print(f"- Successfully converted dates in {len(date_columns)} column(s)")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python date_fix.py <file.csv>")
+    if len(sys.argv) not in (2, 3) or (len(sys.argv) == 3 and sys.argv[2] != '--cache'):
+        print("Usage: python date_fix.py <file.csv> [--cache]")
         sys.exit(1)
-    main(sys.argv[1])
\ No newline at end of file
+    main(sys.argv[1], use_cache=len(sys.argv) == 3)
\ No newline at end of file
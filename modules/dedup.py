@@ -0,0 +1,234 @@
+import sys
+import csv
+import os
+import json
+import heapq
+import hashlib
+import struct
+import tempfile
+from rows import Header, iter_rows, value_at
+
+# Records per partition kept in memory at once; bigger partitions are split again
+PARTITION_RECORDS = 500000
+FANOUT = 64
+# Each split level uses a different 4-byte slice of the 16-byte digest
+MAX_DEPTH = 3
+RECORD_HEADER = struct.Struct('<16sQI')
+
+def encode_key(key):
+    data = json.dumps(key, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest(), data
+
+def partition_of(digest, depth):
+    return int.from_bytes(digest[depth * 4:depth * 4 + 4], 'little') % FANOUT
+
+def write_record(f, digest, row_num, data):
+    f.write(RECORD_HEADER.pack(digest, row_num, len(data)))
+    f.write(data)
+
+def read_records(f):
+    while True:
+        offset = f.tell()
+        header = f.read(RECORD_HEADER.size)
+        if not header:
+            return
+        digest, row_num, length = RECORD_HEADER.unpack(header)
+        yield offset, digest, row_num, f.read(length)
+
+def read_key_at(f, offset):
+    f.seek(offset)
+    _, _, length = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+    return f.read(length)
+
+def spill(records, work_dir, prefix, depth):
+    """Write (digest, row_num, key) records into FANOUT partition files."""
+    paths = [os.path.join(work_dir, f"{prefix}_{i}.bin") for i in range(FANOUT)]
+    counts = [0] * FANOUT
+    files = [open(path, 'wb', buffering=256 * 1024) for path in paths]
+    try:
+        for digest, row_num, data in records:
+            partition = partition_of(digest, depth)
+            write_record(files[partition], digest, row_num, data)
+            counts[partition] += 1
+    finally:
+        for f in files:
+            f.close()
+    return [(path, count, depth) for path, count in zip(paths, counts)]
+
+def leaf_partitions(partitions, work_dir):
+    """Split partitions until each fits the in-memory budget."""
+    pending = list(partitions)
+    while pending:
+        path, count, depth = pending.pop()
+        if count == 0:
+            os.remove(path)
+        elif count <= PARTITION_RECORDS or depth >= MAX_DEPTH:
+            # After MAX_DEPTH splits only keys matching on every level's slice are
+            # left together, so a leaf this big repeats a few keys many times;
+            # first_seen keeps one entry per distinct key and pairs go to disk
+            yield path
+        else:
+            with open(path, 'rb') as f:
+                records = ((digest, row_num, data) for _, digest, row_num, data in read_records(f))
+                children = spill(records, work_dir, os.path.splitext(os.path.basename(path))[0], depth + 1)
+            os.remove(path)
+            pending.extend(children)
+
+def find_duplicates(partition_path, duplicates_path):
+    """Write (row, first occurrence) pairs of a partition to duplicates_path.
+
+    Records are spilled in row order at every level, so pairs come out sorted.
+    """
+    first_seen = {}
+    collisions = {}
+    duplicate_count = 0
+    with open(partition_path, 'rb') as f, open(partition_path, 'rb') as lookup, \
+         open(duplicates_path, 'w', encoding='utf-8') as out:
+        for offset, digest, row_num, data in read_records(f):
+            seen = first_seen.get(digest)
+            if seen is None:
+                first_seen[digest] = (row_num, offset)
+                continue
+            # Same digest: confirm against the stored key of the first occurrence
+            first_row, first_offset = seen
+            if read_key_at(lookup, first_offset) != data:
+                first_row = collisions.setdefault(data, row_num)
+                if first_row == row_num:
+                    continue
+            out.write(f"{row_num},{first_row}\n")
+            duplicate_count += 1
+    return duplicate_count
+
+def read_duplicates(duplicates_path):
+    with open(duplicates_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            row_num, first_row = line.split(',')
+            yield int(row_num), int(first_row)
+
+def merge_duplicate_files(paths, work_dir):
+    """Merge sorted duplicate lists, at most FANOUT files at a time."""
+    level = 0
+    while len(paths) > FANOUT:
+        merged_paths = []
+        for start in range(0, len(paths), FANOUT):
+            group = paths[start:start + FANOUT]
+            merged_path = os.path.join(work_dir, f"merged_{level}_{start}.dup")
+            with open(merged_path, 'w', encoding='utf-8') as f:
+                for row_num, first_row in heapq.merge(*(read_duplicates(path) for path in group)):
+                    f.write(f"{row_num},{first_row}\n")
+            for path in group:
+                os.remove(path)
+            merged_paths.append(merged_path)
+        paths = merged_paths
+        level += 1
+    return heapq.merge(*(read_duplicates(path) for path in paths))
+
+def main(csv_path, key_columns=None):
+    base_name = os.path.basename(csv_path)
+    name_without_ext = os.path.splitext(base_name)[0]
+
+    os.makedirs('./files', exist_ok=True)
+
+    dedup_path = f"./files/{name_without_ext}_dedup.csv"
+    duplicates_path = f"./files/{name_without_ext}_duplicates.csv"
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as infile:
+        first_line = infile.readline()
+        uses_quotes = first_line.startswith('"')
+
+        if ';' in first_line:
+            delimiter = ';'
+        elif ',' in first_line:
+            delimiter = ','
+        else:
+            delimiter = ','
+
+        print(f"Detected delimiter: '{delimiter}'")
+
+    quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
+
+    with tempfile.TemporaryDirectory(prefix='lychee_dedup_') as work_dir:
+        # Pass 1: spill (digest, row number, key) to the partition chosen by the digest
+        with open(csv_path, 'r', encoding='utf-8', newline='') as infile:
+            reader = csv.reader(infile, delimiter=delimiter)
+            header = next(reader, None)
+            if not header:
+                print("Error: CSV file does not contain a header row.")
+                sys.exit(1)
+
+            key_positions = None
+            if key_columns:
+                key_positions = []
+                columns = Header(header)
+                for column in key_columns:
+                    position = columns.find(column)
+                    if position is None:
+                        print(f"Error: key column '{column}' not found.")
+                        print(f"Available columns: {header}")
+                        sys.exit(1)
+                    key_positions.append(position)
+
+            def records():
+                for row_num, row in enumerate(iter_rows(reader, len(header)), 1):
+                    if key_positions is None:
+                        key = [field.strip() for field in row]
+                    else:
+                        key = [value_at(row, i).strip() for i in key_positions]
+                    digest, data = encode_key(key)
+                    yield digest, row_num, data
+
+            partitions = spill(records(), work_dir, 'part', 0)
+
+        # Each leaf partition fits in memory on its own
+        duplicate_paths = []
+        total_duplicates = 0
+        for path in leaf_partitions(partitions, work_dir):
+            duplicate_path = path + '.dup'
+            total_duplicates += find_duplicates(path, duplicate_path)
+            os.remove(path)
+            duplicate_paths.append(duplicate_path)
+
+        if total_duplicates == 0:
+            print("No issues found - no duplicate rows")
+            return
+
+        # Pass 2: stream the input again, routing rows by the merged duplicate list
+        duplicates = merge_duplicate_files(duplicate_paths, work_dir)
+        next_duplicate = next(duplicates, None)
+        unique_rows = 0
+
+        with open(csv_path, 'r', encoding='utf-8', newline='') as infile, \
+             open(dedup_path, 'w', newline='', encoding='utf-8') as dedup_file, \
+             open(duplicates_path, 'w', newline='', encoding='utf-8') as duplicates_file:
+            reader = csv.reader(infile, delimiter=delimiter)
+            dedup_writer = csv.writer(dedup_file, quoting=quoting_style, delimiter=delimiter)
+            duplicates_writer = csv.writer(duplicates_file, quoting=quoting_style, delimiter=delimiter)
+
+            header = next(reader)
+            dedup_writer.writerow(header)
+            duplicates_writer.writerow(['LINHA', 'PRIMEIRA_OCORRENCIA'] + header)
+
+            for row_num, row in enumerate(iter_rows(reader, len(header)), 1):
+                if next_duplicate is not None and next_duplicate[0] == row_num:
+                    duplicates_writer.writerow([row_num, next_duplicate[1]] + row)
+                    next_duplicate = next(duplicates, None)
+                else:
+                    dedup_writer.writerow(row)
+                    unique_rows += 1
+
+    print(f"Deduplication complete:")
+    print(f"- Deduplicated file: {dedup_path}")
+    print(f"- Duplicate rows (with first occurrence): {duplicates_path}")
+    print(f"- Unique rows: {unique_rows}")
+    print(f"- Duplicate rows removed: {total_duplicates}")
+    if key_columns:
+        print(f"- Key columns: {', '.join(key_columns)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        main(sys.argv[1])
+    elif len(sys.argv) == 4 and sys.argv[2] == '--keys':
+        main(sys.argv[1], key_columns=sys.argv[3].split(','))
+    else:
+        print("Usage: python dedup.py <file.csv> [--keys COL1,COL2]")
+        sys.exit(1)
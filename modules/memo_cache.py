@@ -0,0 +1,119 @@
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = './files/memo_cache.sqlite'
+DEFAULT_MAX_ENTRIES = 500000
+DEFAULT_WARM_ENTRIES = 50000
+LOOKUP_BATCH_SIZE = 500
+
+
+class MemoCache:
+    """On-disk key -> result cache shared between runs.
+
+    Entries are namespaced by stage and version, so bumping a stage's version
+    invalidates its old results. The most recently used entries are loaded
+    into memory on open; everything else is fetched in batches by resolve()
+    and written back in a single transaction on close().
+    """
+
+    def __init__(self, stage, version, path=DEFAULT_CACHE_PATH,
+                 max_entries=DEFAULT_MAX_ENTRIES, warm_entries=DEFAULT_WARM_ENTRIES):
+        self.namespace = f"{stage}:v{version}"
+        self.path = path
+        self.max_entries = max_entries
+        self.memory = {}
+        self.used = set()
+        self.pending = {}
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS memo ("
+            "namespace TEXT NOT NULL, "
+            "key TEXT NOT NULL, "
+            "value TEXT, "
+            "last_used INTEGER NOT NULL, "
+            "UNIQUE (namespace, key))"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS memo_last_used ON memo (last_used)")
+        self._warm_load(warm_entries)
+
+    def _warm_load(self, warm_entries):
+        cursor = self.conn.execute(
+            "SELECT key, value FROM memo WHERE namespace = ? ORDER BY last_used DESC LIMIT ?",
+            (self.namespace, warm_entries)
+        )
+        self.memory.update(cursor.fetchall())
+
+    def _fetch(self, keys):
+        found = {}
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start + LOOKUP_BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            cursor = self.conn.execute(
+                f"SELECT key, value FROM memo WHERE namespace = ? AND key IN ({placeholders})",
+                (self.namespace, *batch)
+            )
+            found.update(cursor.fetchall())
+        return found
+
+    def resolve(self, keys, compute):
+        """Return a dict mapping every key to its result, computing only misses."""
+        results = {}
+        missing = []
+        for key in set(keys):
+            if key in self.memory:
+                results[key] = self.memory[key]
+            else:
+                missing.append(key)
+
+        if missing:
+            fetched = self._fetch(missing)
+            self.memory.update(fetched)
+            results.update(fetched)
+
+        self.hits += len(results)
+        self.used.update(results.keys())
+
+        for key in missing:
+            if key in results:
+                continue
+            value = compute(key)
+            results[key] = value
+            self.memory[key] = value
+            self.pending[key] = value
+            self.misses += 1
+
+        return results
+
+    def close(self):
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO memo (namespace, key, value, last_used) VALUES (?, ?, ?, ?)",
+                ((self.namespace, key, value, now) for key, value in self.pending.items())
+            )
+            self.conn.executemany(
+                "UPDATE memo SET last_used = ? WHERE namespace = ? AND key = ?",
+                ((now, self.namespace, key) for key in self.used if key not in self.pending)
+            )
+            total = self.conn.execute("SELECT COUNT(*) FROM memo").fetchone()[0]
+            if total > self.max_entries:
+                self.conn.execute(
+                    "DELETE FROM memo WHERE rowid IN "
+                    "(SELECT rowid FROM memo ORDER BY last_used ASC, rowid ASC LIMIT ?)",
+                    (total - self.max_entries,)
+                )
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
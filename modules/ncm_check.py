@@ -4,25 +4,36 @@ import csv
 import os
 import shutil
 from collections import defaultdict
+from sqlite_out import open_database, create_table, bulk_load, create_indexes, clean_fields, column_names, table_name_for
+from partition_writer import PartitionWriter
+from rows import Header, iter_rows, value_at
 
-def sort_by_group_and_subgroup(rows, fieldnames):
-    grupo_column = None
-    subgrupo_column = None
-    
-    for field in fieldnames:
-        clean_field = field.strip('"').strip().lower()
-        if clean_field in ['grupo', 'group']:
-            grupo_column = field
-        elif clean_field in ['sub_grupo', 'subgrupo', 'SUBGRUPO', 'SUB_GRUPO']:
-            subgrupo_column = field
+def find_group_columns(header):
+    return header.find('grupo'), header.find('sub_grupo')
+
+def group_values(row, grupo_position, subgrupo_position):
+    grupo = value_at(row, grupo_position).strip().strip('"')
+    subgrupo = value_at(row, subgrupo_position).strip().strip('"')
+    return grupo, subgrupo
+
+def numeric_first_key(value):
+    try:
+        return (0, int(value))
+    except ValueError:
+        return (1, value)
+
+def shard_sort_key(key):
+    return tuple(numeric_first_key(value) for value in key)
+
+def sort_by_group_and_subgroup(rows, header):
+    grupo_position, subgrupo_position = find_group_columns(header)
     
-    if grupo_column is None:
+    if grupo_position is None:
         print("Warning: GRUPO column not found. Sorting by first column.")
         return rows
     
     def sort_key(row):
-        grupo = row.get(grupo_column, '').strip().strip('"')
-        subgrupo = row.get(subgrupo_column, '').strip().strip('"') if subgrupo_column else ''
+        grupo, subgrupo = group_values(row, grupo_position, subgrupo_position)
         
         try:
             grupo_int = int(grupo) if grupo else 999999
@@ -38,16 +49,14 @@ def sort_by_group_and_subgroup(rows, fieldnames):
     
     return sorted(rows, key=sort_key)
 
-def print_subgroup_aggregation(rows, fieldnames):
-    grupo_column = None
-    subgrupo_column = None
+def count_by_group(aggregation, grupo, subgrupo):
+    grupo_display = grupo if grupo else 'None'
+    subgrupo_display = subgrupo if subgrupo else 'None'
     
-    for field in fieldnames:
-        clean_field = field.strip('"').strip().lower()
-        if clean_field in ['grupo', 'group']:
-            grupo_column = field
-        elif clean_field in ['sub_grupo', 'subgrupo', 'sub_group', 'subgroup']:
-            subgrupo_column = field
+    aggregation[grupo_display][subgrupo_display] += 1
+
+def print_subgroup_aggregation(rows, header):
+    grupo_position, subgrupo_position = find_group_columns(header)
     
     if not rows:
         return
@@ -55,25 +64,17 @@ def print_subgroup_aggregation(rows, fieldnames):
     aggregation = defaultdict(lambda: defaultdict(int))
     
     for row in rows:
-        grupo = row.get(grupo_column, '').strip().strip('"') if grupo_column else ''
-        subgrupo = row.get(subgrupo_column, '').strip().strip('"') if subgrupo_column else ''
-        
-        grupo_display = grupo if grupo else 'None'
-        subgrupo_display = subgrupo if subgrupo else 'None'
-            
-        aggregation[grupo_display][subgrupo_display] += 1
+        grupo, subgrupo = group_values(row, grupo_position, subgrupo_position)
+        count_by_group(aggregation, grupo, subgrupo)
     
+    print_aggregation(aggregation)
+
+def print_aggregation(aggregation):
     print("\n" + "="*60)
     print("AGGREGATION SUMMARY BY GROUP AND SUBGROUP")
     print("="*60)
     
-    def sort_key(grupo):
-        try:
-            return (0, int(grupo))
-        except ValueError:
-            return (1, grupo)
-    
-    sorted_grupos = sorted(aggregation.keys(), key=sort_key)
+    sorted_grupos = sorted(aggregation.keys(), key=numeric_first_key)
     
     for grupo in sorted_grupos:
         subgroups = aggregation[grupo]
@@ -82,18 +83,41 @@ def print_subgroup_aggregation(rows, fieldnames):
         print(f"\nGroup {grupo}: {total_grupo} items")
         print("-" * 40)
         
-        def sort_subgroup_key(subgrupo):
-            try:
-                return (0, int(subgrupo))
-            except ValueError:
-                return (1, subgrupo)
-        
-        sorted_subgroups = sorted(subgroups.keys(), key=sort_subgroup_key)
+        sorted_subgroups = sorted(subgroups.keys(), key=numeric_first_key)
         for subgrupo in sorted_subgroups:
             count = subgroups[subgrupo]
             print(f"  └─ {subgrupo}: {count} items")
 
-def main(csv_path):
+def write_sqlite(name_without_ext, fieldnames, valid_rows, invalid_rows, index_columns=None):
+    db_path = f"./files/{name_without_ext}.sqlite"
+    table = table_name_for(name_without_ext)
+    columns = column_names(fieldnames)
+
+    conn = open_database(db_path)
+    try:
+        for suffix, rows in (('valid', valid_rows), ('invalid', invalid_rows)):
+            create_table(conn, f"{table}_{suffix}", columns)
+            bulk_load(conn, f"{table}_{suffix}", columns, (clean_fields(row[:len(columns)]) for row in rows))
+            indexed = create_indexes(conn, f"{table}_{suffix}", columns, index_columns or [])
+    finally:
+        conn.close()
+
+    print(f"Processing complete:")
+    print(f"- Database: {db_path}")
+    print(f"- Invalid rows (for review): table {table}_invalid ({len(invalid_rows)} rows)")
+    print(f"- Valid rows: table {table}_valid ({len(valid_rows)} rows)")
+    if indexed:
+        print(f"- Indexes created on: {', '.join(indexed)}")
+
+def print_partition_summary(shard_dir, manifest_path, manifest, valid_count):
+    invalid_count = sum(shard['rows'] for shard in manifest)
+    print(f"Processing complete:")
+    print(f"- Invalid rows (for review): {len(manifest)} file(s) in {shard_dir}")
+    print(f"- Manifest: {manifest_path}")
+    print(f"- Found {invalid_count} invalid NCM codes")
+    print(f"- Valid rows: {valid_count}")
+
+def main(csv_path, to_sqlite=False, partition_by=None, index_columns=None):
     valid_ncm_path = './files/valid_ncm.json'
     
     if not os.path.exists(valid_ncm_path):
@@ -110,9 +134,11 @@ def main(csv_path):
     
     corrected_path = f"./files/{name_without_ext}_checked.csv"
     invalids_path = f"./files/{name_without_ext}_invalid.csv"
+    shard_dir = f"./files/{name_without_ext}_invalid"
 
     invalid_rows = []
     corrected_rows = []
+    valid_count = 0
     has_modifications = False
 
     with open(csv_path, 'r', encoding='utf-8') as infile:
@@ -129,51 +155,91 @@ def main(csv_path):
         print(f"Detected delimiter: '{delimiter}'")
         infile.seek(0)
         
-        reader = csv.DictReader(infile, delimiter=delimiter)
-        fieldnames = reader.fieldnames
+        reader = csv.reader(infile, delimiter=delimiter)
+        fieldnames = next(reader, None)
         if fieldnames is None:
             print("Error: CSV file does not contain a header row.")
             sys.exit(1)
         
-        ncm_column = None
-        possible_ncm_names = ['NCM', 'ncm', '"NCM"', '"ncm"'] 
-        
-        for field in fieldnames:
-            clean_field = field.strip('"').strip()
-            if clean_field.lower() == 'ncm':
-                ncm_column = field
-                break
+        header = Header(fieldnames)
+        ncm_position = header.find('ncm')
         
-        if ncm_column is None:
+        if ncm_position is None:
             print("Error: CSV file does not contain an NCM column.")
             print(f"Available columns: {fieldnames}")
             sys.exit(1)
 
-        for row in reader:
-            ncm_value = row.get(ncm_column, '').strip()
+        quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
+
+        partition_writer = None
+        checked_file = None
+        if partition_by:
+            grupo_position, subgrupo_position = find_group_columns(header)
+            if grupo_position is None:
+                print("Error: CSV file does not contain a GRUPO column.")
+                print(f"Available columns: {fieldnames}")
+                sys.exit(1)
+            key_names = ['GRUPO', 'SUB_GRUPO'] if partition_by == 'subgrupo' else ['GRUPO']
+            if os.path.isdir(shard_dir):
+                shutil.rmtree(shard_dir)
+            partition_writer = PartitionWriter(shard_dir, fieldnames, key_names,
+                                               quoting=quoting_style, delimiter=delimiter)
+            aggregation = defaultdict(lambda: defaultdict(int))
+            # Valid rows go straight to disk so memory doesn't grow with the file
+            checked_file = open(corrected_path, 'w', newline='', encoding='utf-8')
+            checked_writer = csv.writer(checked_file, quoting=quoting_style, delimiter=delimiter)
+            checked_writer.writerow(fieldnames)
+
+        try:
+            for row in iter_rows(reader, len(header)):
+                ncm_value = row[ncm_position].strip()
             
-            if ncm_value not in valid_ncm:
-                invalid_rows.append(row.copy())
-                has_modifications = True
-            else:
-                corrected_rows.append(row)
+                if ncm_value not in valid_ncm:
+                    has_modifications = True
+                    if partition_writer is not None:
+                        grupo, subgrupo = group_values(row, grupo_position, subgrupo_position)
+                        key = (grupo, subgrupo) if partition_by == 'subgrupo' else (grupo,)
+                        partition_writer.write(key, row)
+                        count_by_group(aggregation, grupo, subgrupo)
+                    else:
+                        invalid_rows.append(row)
+                elif checked_file is not None:
+                    checked_writer.writerow(row)
+                    valid_count += 1
+                else:
+                    corrected_rows.append(row)
+        finally:
+            if partition_writer is not None:
+                checked_file.close()
+                manifest_path, manifest = partition_writer.close(sort_key=shard_sort_key)
 
-    if not has_modifications:
+    if not has_modifications and not to_sqlite:
+        if partition_writer is not None:
+            shutil.rmtree(shard_dir)
+            os.remove(corrected_path)
         print("No issues found - all rows are valid")
         return
 
-    quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
+    if partition_writer is not None:
+        print_partition_summary(shard_dir, manifest_path, manifest, valid_count)
+        print_aggregation(aggregation)
+        return
+
+    sorted_invalid_rows = sort_by_group_and_subgroup(invalid_rows, header)
+
+    if to_sqlite:
+        write_sqlite(name_without_ext, fieldnames, corrected_rows, sorted_invalid_rows, index_columns)
+        print_subgroup_aggregation(sorted_invalid_rows, header)
+        return
 
     with open(corrected_path, 'w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames, quoting=quoting_style, delimiter=delimiter)
-        writer.writeheader()
+        writer = csv.writer(outfile, quoting=quoting_style, delimiter=delimiter)
+        writer.writerow(fieldnames)
         writer.writerows(corrected_rows)
 
-    sorted_invalid_rows = sort_by_group_and_subgroup(invalid_rows, fieldnames)
-    
     with open(invalids_path, 'w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=fieldnames, quoting=quoting_style, delimiter=delimiter)
-        writer.writeheader()
+        writer = csv.writer(outfile, quoting=quoting_style, delimiter=delimiter)
+        writer.writerow(fieldnames)
         writer.writerows(sorted_invalid_rows)
 
     print(f"Processing complete:")
@@ -181,10 +247,18 @@ def main(csv_path):
     print(f"- Found {len(invalid_rows)} invalid NCM codes")
     print(f"- Valid rows: {len(corrected_rows)}")
     
-    print_subgroup_aggregation(sorted_invalid_rows, fieldnames)
+    print_subgroup_aggregation(sorted_invalid_rows, header)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python ncm_check.py <file.csv>")
+    args = sys.argv[2:]
+    if len(sys.argv) == 2:
+        main(sys.argv[1])
+    elif args == ['--sqlite']:
+        main(sys.argv[1], to_sqlite=True)
+    elif len(args) == 3 and args[:2] == ['--sqlite', '--index']:
+        main(sys.argv[1], to_sqlite=True, index_columns=args[2].split(','))
+    elif len(args) == 2 and args[0] == '--partition' and args[1] in ('grupo', 'subgrupo'):
+        main(sys.argv[1], partition_by=args[1])
+    else:
+        print("Usage: python ncm_check.py <file.csv> [--sqlite [--index COL1,COL2] | --partition grupo|subgrupo]")
         sys.exit(1)
-    main(sys.argv[1])
\ No newline at end of file
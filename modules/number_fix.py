@@ -0,0 +1,146 @@
+import sys
+import csv
+import os
+import re
+from itertools import islice
+
+SAMPLE_SIZE = 1000
+CHUNK_SIZE = 50000
+NUMERIC_THRESHOLD = 0.9
+
+# Only these blanks are accepted around numbers; TO_CANONICAL must remove every one of them
+BLANKS = ' \t\xa0'
+
+# 1.234,56 / 1234,56 / R$ 1.234,56 / -R$ 1,00 / R$ -1,00
+BR_NUMBER_RE = re.compile(
+    r'[ \t\xa0]*(?:-[ \t\xa0]*(?:R\$[ \t\xa0]*)?|(?:R\$[ \t\xa0]*)?-?)'
+    r'(?:\d{1,3}(?:\.\d{3})+|\d+)(?:,\d+)?[ \t\xa0]*'
+)
+TO_CANONICAL = str.maketrans({',': '.', '.': None, 'R': None, '$': None, **{blank: None for blank in BLANKS}})
+LEADING_ZEROS_RE = re.compile(r'^(-?)0+(?=\d)', re.MULTILINE)
+
+def detect_numeric_columns(sample_rows, fieldnames):
+    numeric_columns = []
+    for position, field in enumerate(fieldnames):
+        values = [row[position] for row in sample_rows if position < len(row) and row[position].strip()]
+        if not values:
+            continue
+        matches = sum(1 for value in values if BR_NUMBER_RE.fullmatch(value))
+        # Plain integers (codes, NCM, groups) are left alone
+        has_decimal_format = any(',' in value or 'R$' in value for value in values)
+        if has_decimal_format and matches / len(values) >= NUMERIC_THRESHOLD:
+            numeric_columns.append(position)
+    return numeric_columns
+
+def convert_block(values):
+    """Convert a block of BR-formatted numbers to canonical decimal strings.
+
+    The whole block is translated with a single str.translate call; the result
+    for each valid cell is the same as str(Decimal(...)) of the value. Returns
+    the converted values and a list of booleans flagging valid cells.
+    """
+    valid = list(map(bool, map(BR_NUMBER_RE.fullmatch, values)))
+    # Valid cells never contain a newline; invalid ones are blanked so they can't split the block
+    block = '\n'.join(value if is_valid else '' for value, is_valid in zip(values, valid))
+
+    converted = LEADING_ZEROS_RE.sub(r'\1', block.translate(TO_CANONICAL)).split('\n')
+    if len(converted) != len(values):
+        raise ValueError(f"Block conversion misaligned: {len(values)} values, {len(converted)} results")
+    return converted, valid
+
+def main(csv_path):
+    base_name = os.path.basename(csv_path)
+    name_without_ext = os.path.splitext(base_name)[0]
+
+    os.makedirs('./files', exist_ok=True)
+
+    fixed_path = f"./files/{name_without_ext}_number_fixed.csv"
+    errors_path = f"./files/{name_without_ext}_number_errors.csv"
+
+    converted_cells = 0
+    error_count = 0
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as infile:
+        first_line = infile.readline()
+        uses_quotes = first_line.startswith('"')
+
+        if ';' in first_line:
+            delimiter = ';'
+        elif ',' in first_line:
+            delimiter = ','
+        else:
+            delimiter = ','
+
+        print(f"Detected delimiter: '{delimiter}'")
+        infile.seek(0)
+
+        reader = csv.reader(infile, delimiter=delimiter)
+        fieldnames = next(reader, None)
+        if not fieldnames:
+            print("Error: CSV file does not contain a header row.")
+            sys.exit(1)
+
+        chunk = list(islice(reader, CHUNK_SIZE))
+        numeric_columns = detect_numeric_columns(chunk[:SAMPLE_SIZE], fieldnames)
+
+        if not numeric_columns:
+            print("No numeric columns found (looking for values like 1.234,56 or R$ 1.234,56).")
+            print(f"Available columns: {fieldnames}")
+            sys.exit(1)
+
+        print(f"Found numeric columns: {[fieldnames[position] for position in numeric_columns]}")
+
+        quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
+
+        with open(fixed_path, 'w', newline='', encoding='utf-8') as fixed_file, \
+             open(errors_path, 'w', newline='', encoding='utf-8') as errors_file:
+            fixed_writer = csv.writer(fixed_file, quoting=quoting_style, delimiter=delimiter)
+            errors_writer = csv.writer(errors_file, quoting=quoting_style, delimiter=delimiter)
+            fixed_writer.writerow(fieldnames)
+            errors_writer.writerow(fieldnames)
+
+            row_offset = 0
+            while chunk:
+                error_rows = set()
+                updates = []
+                for position in numeric_columns:
+                    values = [row[position] if position < len(row) else '' for row in chunk]
+                    converted, valid = convert_block(values)
+
+                    for index, value in enumerate(values):
+                        if not value.strip():
+                            continue
+                        if valid[index]:
+                            if converted[index] != value:
+                                updates.append((index, position, converted[index]))
+                        else:
+                            error_rows.add(index)
+                            print(f"Warning: Could not parse number '{value}' in column "
+                                  f"'{fieldnames[position]}' (row {row_offset + index + 1})")
+
+                errors_writer.writerows(chunk[index] for index in sorted(error_rows))
+                error_count += len(error_rows)
+
+                for index, position, value in updates:
+                    chunk[index][position] = value
+                converted_cells += len(updates)
+                fixed_writer.writerows(chunk)
+
+                row_offset += len(chunk)
+                chunk = list(islice(reader, CHUNK_SIZE))
+
+    if not error_count:
+        os.remove(errors_path)
+
+    print(f"Processing complete:")
+    print(f"- Fixed file (numbers → 1234.56): {fixed_path}")
+    if error_count:
+        print(f"- Error rows (unparseable numbers): {errors_path}")
+        print(f"- Found {error_count} rows with unparseable numbers")
+    print(f"- Converted {converted_cells} value(s) in {len(numeric_columns)} column(s)")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("Usage: python number_fix.py <file.csv>")
+        sys.exit(1)
+    main(sys.argv[1])
@@ -0,0 +1,90 @@
+import csv
+import json
+import os
+import re
+from collections import OrderedDict
+
+DEFAULT_MAX_OPEN_FILES = 64
+DEFAULT_BUFFER_SIZE = 256 * 1024
+
+
+class PartitionWriter:
+    """Streams CSV rows into one file per partition key.
+
+    Only max_open_files handles are kept open at a time; the least recently
+    used one is closed when a new partition needs a slot and reopened in
+    append mode if more rows for it show up later.
+    """
+
+    def __init__(self, output_dir, fieldnames, key_names, max_open_files=DEFAULT_MAX_OPEN_FILES,
+                 buffer_size=DEFAULT_BUFFER_SIZE, **writer_options):
+        self.output_dir = output_dir
+        self.fieldnames = fieldnames
+        self.key_names = key_names
+        self.max_open_files = max_open_files
+        self.buffer_size = buffer_size
+        self.writer_options = writer_options
+        self.open_files = OrderedDict()
+        self.shards = {}
+        self.used_names = set()
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _shard_name(self, key):
+        parts = []
+        for key_name, value in zip(self.key_names, key):
+            clean_value = re.sub(r'[^\w-]', '_', value) or 'None'
+            parts.append(f"{key_name}_{clean_value}")
+        name = '_'.join(parts)
+        candidate = name
+        suffix = 2
+        # Windows file names are case-insensitive, so 'a' and 'A' must not share a file
+        while candidate.lower() in self.used_names:
+            candidate = f"{name}_{suffix}"
+            suffix += 1
+        self.used_names.add(candidate.lower())
+        return f"{candidate}.csv"
+
+    def _writer_for(self, key):
+        if key in self.open_files:
+            self.open_files.move_to_end(key)
+            return self.open_files[key][1]
+
+        if len(self.open_files) >= self.max_open_files:
+            _, (oldest_file, _) = self.open_files.popitem(last=False)
+            oldest_file.close()
+
+        shard = self.shards.get(key)
+        if shard is None:
+            shard = {'file': self._shard_name(key), 'rows': 0}
+            self.shards[key] = shard
+            mode = 'w'
+        else:
+            mode = 'a'
+
+        path = os.path.join(self.output_dir, shard['file'])
+        f = open(path, mode, newline='', encoding='utf-8', buffering=self.buffer_size)
+        writer = csv.writer(f, **self.writer_options)
+        if mode == 'w':
+            writer.writerow(self.fieldnames)
+        self.open_files[key] = (f, writer)
+        return writer
+
+    def write(self, key, row):
+        self._writer_for(key).writerow(row)
+        self.shards[key]['rows'] += 1
+
+    def close(self, sort_key=None):
+        while self.open_files:
+            _, (f, _) = self.open_files.popitem()
+            f.close()
+
+        manifest = []
+        for key in sorted(self.shards, key=sort_key):
+            entry = dict(zip(self.key_names, key))
+            entry.update(self.shards[key])
+            manifest.append(entry)
+
+        manifest_path = os.path.join(self.output_dir, 'manifest.json')
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+        return manifest_path, manifest
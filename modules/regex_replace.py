@@ -3,6 +3,15 @@ import csv
 import os
 import unicodedata
 import re
+import hashlib
+import pickle
+from memo_cache import MemoCache
+from aho_corasick import Automaton
+from rows import iter_rows
+
+NORMALIZE_VERSION = 1
+RULES_ENGINE_VERSION = 1
+RULES_CACHE_DIR = './files/rules_cache'
 
 def normalize_text(text):
     if not text:
@@ -59,7 +68,66 @@ def normalize_text(text):
     
     return ascii_text
 
-def main(csv_path):
+def load_rules(rules_path):
+    with open(rules_path, 'r', encoding='utf-8', newline='') as f:
+        first_line = f.readline()
+        delimiter = ';' if ';' in first_line else ','
+        f.seek(0)
+
+        reader = csv.reader(f, delimiter=delimiter)
+        header = [field.strip().lower() for field in next(reader, [])]
+        if header[:2] not in (['padrao', 'substituicao'], ['pattern', 'replacement']):
+            print("Error: rules file must start with a PADRAO;SUBSTITUICAO[;COLUNAS] header.")
+            sys.exit(1)
+
+        rules = []
+        for line_num, record in enumerate(reader, 2):
+            if not record or not record[0]:
+                continue
+            if len(record) < 2:
+                print(f"Warning: rules line {line_num} has no replacement, skipping")
+                continue
+            columns = None
+            if len(record) > 2 and record[2].strip():
+                columns = [column.strip().upper() for column in record[2].split('|')]
+            # Cells are normalized before the rules run, so patterns must be too
+            rules.append((normalize_text(record[0]), normalize_text(record[1]), columns))
+    return rules
+
+def compile_rules(rules_path):
+    with open(rules_path, 'rb') as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    # Patterns are stored normalized, so a new normalize_text must recompile them too
+    cache_path = os.path.join(
+        RULES_CACHE_DIR, f"{digest}_v{RULES_ENGINE_VERSION}_n{NORMALIZE_VERSION}.pickle"
+    )
+
+    if os.path.exists(cache_path):
+        with open(cache_path, 'rb') as f:
+            print(f"Loaded compiled rules from {cache_path}")
+            return pickle.load(f)
+
+    rules = load_rules(rules_path)
+    named_columns = {column for _, _, columns in rules if columns for column in columns}
+
+    global_rules = {pattern: replacement for pattern, replacement, columns in rules if columns is None}
+    automata = {'': Automaton(global_rules)}
+    for column in named_columns:
+        column_rules = dict(global_rules)
+        column_rules.update(
+            (pattern, replacement) for pattern, replacement, columns in rules
+            if columns and column in columns
+        )
+        automata[column] = Automaton(column_rules)
+
+    os.makedirs(RULES_CACHE_DIR, exist_ok=True)
+    with open(cache_path, 'wb') as f:
+        pickle.dump(automata, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    print(f"Compiled {len(rules)} rules for {len(named_columns)} specific column(s)")
+    return automata
+
+def main(csv_path, use_cache=False, rules_path=None):
     base_name = os.path.basename(csv_path)
     name_without_ext = os.path.splitext(base_name)[0]
     
@@ -81,43 +149,59 @@ def main(csv_path):
         
         uses_quotes = first_line.startswith('"')
         
-        reader = csv.DictReader(infile, delimiter=delimiter)
-        fieldnames = reader.fieldnames
+        reader = csv.reader(infile, delimiter=delimiter)
+        fieldnames = next(reader, None)
         
         if fieldnames is None:
             print("Error: CSV file does not contain a header row.")
             sys.exit(1)
         
         cleaned_fieldnames = [normalize_text(field) for field in fieldnames]
+        rows = list(iter_rows(reader, len(fieldnames)))
+
+    normalized = None
+    if use_cache:
+        # normalize_text returns ASCII text unchanged (codes, amounts, dates), so only the rest is cached
+        values = {value for row in rows for value in row if not value.isascii()}
+        with MemoCache('normalize_text', NORMALIZE_VERSION) as cache:
+            normalized = cache.resolve(values, normalize_text)
+            print(f"Cache: {cache.hits} hits, {cache.misses} misses")
+
+    column_automata = None
+    if rules_path:
+        automata = compile_rules(rules_path)
+        column_automata = [
+            automata.get(field.strip('"').strip().upper(), automata[''])
+            for field in cleaned_fieldnames
+        ]
+
+    changes_made = 0
+
+    for row_num, row in enumerate(rows, 1):
+        row_changed = False
         
-        cleaned_rows = []
-        changes_made = 0
-        
-        for row_num, row in enumerate(reader, 1):
-            cleaned_row = {}
-            row_changed = False
-            
-            for original_field, cleaned_field in zip(fieldnames, cleaned_fieldnames):
-                original_value = row.get(original_field, '')
+        for position, original_value in enumerate(row):
+            if normalized is not None:
+                cleaned_value = original_value if original_value.isascii() else normalized[original_value]
+            else:
                 cleaned_value = normalize_text(original_value)
-                
-                if original_value != cleaned_value:
-                    row_changed = True
-                    changes_made += 1
-                
-                cleaned_row[cleaned_field] = cleaned_value
-            
-            if row_changed:
-                print(f"Row {row_num}, normalized")
+            if column_automata is not None and position < len(column_automata):
+                cleaned_value = column_automata[position].replace(cleaned_value)
             
-            cleaned_rows.append(cleaned_row)
+            if original_value != cleaned_value:
+                row_changed = True
+                changes_made += 1
+                row[position] = cleaned_value
+        
+        if row_changed:
+            print(f"Row {row_num}, normalized")
 
     quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
 
     with open(cleaned_path, 'w', newline='', encoding='utf-8') as outfile:
-        writer = csv.DictWriter(outfile, fieldnames=cleaned_fieldnames, quoting=quoting_style, delimiter=delimiter)
-        writer.writeheader()
-        writer.writerows(cleaned_rows)
+        writer = csv.writer(outfile, quoting=quoting_style, delimiter=delimiter)
+        writer.writerow(cleaned_fieldnames)
+        writer.writerows(rows)
 
     print(f"ASCII cleaning complete:")
     print(f"- Cleaned file: {cleaned_path}")
@@ -125,7 +209,19 @@ def main(csv_path):
     print(f"- All non-ASCII characters normalized to ASCII equivalents")
 
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python regex_replace.py <file.csv>")
+    args = sys.argv[2:]
+    use_cache = False
+    rules_path = None
+    while args:
+        if args[0] == '--cache':
+            use_cache = True
+            args = args[1:]
+        elif args[0] == '--rules' and len(args) >= 2:
+            rules_path = args[1]
+            args = args[2:]
+        else:
+            break
+    if len(sys.argv) < 2 or args:
+        print("Usage: python regex_replace.py <file.csv> [--cache] [--rules rules.csv]")
         sys.exit(1)
-    main(sys.argv[1])
+    main(sys.argv[1], use_cache=use_cache, rules_path=rules_path)
@@ -0,0 +1,245 @@
+import sys
+import csv
+import os
+import hashlib
+import struct
+from array import array
+from bisect import bisect_left, bisect_right
+from rows import Header, value_at, clean_column_name
+
+STORE_DIR = './files/delta'
+STORE_MAGIC = b'LYDELTA2'
+FULL_ROW_KEY = 'row'
+FIELD_SEPARATOR = '\x1f'
+
+def row_hash(values):
+    data = FIELD_SEPARATOR.join(values).encode('utf-8')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+def store_paths(store_name, name_without_ext):
+    store_path = os.path.join(STORE_DIR, f"{store_name}.bin")
+    pending_path = os.path.join(STORE_DIR, f"{store_name}.{name_without_ext}.pending.bin")
+    return store_path, pending_path
+
+def load_store(store_path):
+    """Return (key_spec, keys, contents); key_spec is None when there is no store yet."""
+    keys = array('Q')
+    contents = array('Q')
+    if not os.path.exists(store_path):
+        return None, keys, contents
+
+    with open(store_path, 'rb') as f:
+        if f.read(len(STORE_MAGIC)) != STORE_MAGIC:
+            print(f"Warning: {store_path} is not a delta store, starting from scratch")
+            return None, keys, contents
+        (spec_length,) = struct.unpack('<I', f.read(4))
+        key_spec = f.read(spec_length).decode('utf-8')
+        (count,) = struct.unpack('<Q', f.read(8))
+        keys.fromfile(f, count)
+        contents.fromfile(f, count)
+    return key_spec, keys, contents
+
+def save_store(store_path, key_spec, keys, contents):
+    os.makedirs(os.path.dirname(store_path), exist_ok=True)
+    tmp_path = store_path + '.tmp'
+    spec = key_spec.encode('utf-8')
+    with open(tmp_path, 'wb') as f:
+        f.write(STORE_MAGIC)
+        f.write(struct.pack('<I', len(spec)))
+        f.write(spec)
+        f.write(struct.pack('<Q', len(keys)))
+        keys.tofile(f)
+        contents.tofile(f)
+    os.replace(tmp_path, store_path)
+
+def sorted_pairs(keys, contents):
+    """Sort (key, content) pairs; rows sharing a key are all kept."""
+    order = sorted(range(len(keys)), key=lambda index: (keys[index], contents[index]))
+    return array('Q', (keys[i] for i in order)), array('Q', (contents[i] for i in order))
+
+def key_runs(keys, contents):
+    start = 0
+    while start < len(keys):
+        end = bisect_right(keys, keys[start], start)
+        yield keys[start], contents[start:end]
+        start = end
+
+def common_count(a, b):
+    """Size of the multiset intersection of two sorted sequences."""
+    i = j = common = 0
+    while i < len(a) and j < len(b):
+        if a[i] < b[j]:
+            i += 1
+        elif a[i] > b[j]:
+            j += 1
+        else:
+            common += 1
+            i += 1
+            j += 1
+    return common
+
+def delta_counts(previous_keys, previous_contents, current_keys, current_contents):
+    """Return (unchanged, changed, added, removed) comparing rows key by key.
+
+    Within a key, identical rows are unchanged; the rest are paired as changed
+    and whatever is left over on either side is added or removed.
+    """
+    unchanged = changed = added = removed = 0
+    previous_runs = key_runs(previous_keys, previous_contents)
+    current_runs = key_runs(current_keys, current_contents)
+    previous = next(previous_runs, None)
+    current = next(current_runs, None)
+    while previous is not None or current is not None:
+        if current is None or (previous is not None and previous[0] < current[0]):
+            removed += len(previous[1])
+            previous = next(previous_runs, None)
+        elif previous is None or current[0] < previous[0]:
+            added += len(current[1])
+            current = next(current_runs, None)
+        else:
+            same = common_count(previous[1], current[1])
+            paired = min(len(previous[1]), len(current[1])) - same
+            unchanged += same
+            changed += paired
+            added += len(current[1]) - same - paired
+            removed += len(previous[1]) - same - paired
+            previous = next(previous_runs, None)
+            current = next(current_runs, None)
+    return unchanged, changed, added, removed
+
+def commit_store(csv_path, store_name='default'):
+    """Make the hashes of a processed file the baseline for the next delta."""
+    name_without_ext = os.path.splitext(os.path.basename(csv_path))[0]
+    store_path, pending_path = store_paths(store_name, name_without_ext)
+
+    if not os.path.exists(pending_path):
+        print(f"Error: no pending delta for '{name_without_ext}' in store '{store_name}'.")
+        print("Run row_delta.py on the file first.")
+        sys.exit(1)
+
+    os.replace(pending_path, store_path)
+    print(f"Delta store updated: {store_path}")
+
+def main(csv_path, key_columns=None, store_name='default'):
+    base_name = os.path.basename(csv_path)
+    name_without_ext = os.path.splitext(base_name)[0]
+
+    os.makedirs('./files', exist_ok=True)
+
+    delta_path = f"./files/{name_without_ext}_delta.csv"
+    store_path, pending_path = store_paths(store_name, name_without_ext)
+
+    previous_spec, previous_keys, previous_contents = load_store(store_path)
+    current_keys = array('Q')
+    current_contents = array('Q')
+    # Rows of previous_contents already matched, counted at the start of each run of equal pairs
+    matched = array('I', [0]) * len(previous_keys)
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as infile:
+        first_line = infile.readline()
+        uses_quotes = first_line.startswith('"')
+
+        if ';' in first_line:
+            delimiter = ';'
+        elif ',' in first_line:
+            delimiter = ','
+        else:
+            delimiter = ','
+
+        print(f"Detected delimiter: '{delimiter}'")
+        infile.seek(0)
+
+        reader = csv.reader(infile, delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            print("Error: CSV file does not contain a header row.")
+            sys.exit(1)
+
+        key_positions = None
+        if key_columns:
+            key_positions = []
+            columns = Header(header)
+            for column in key_columns:
+                position = columns.find(column)
+                if position is None:
+                    print(f"Error: key column '{column}' not found.")
+                    print(f"Available columns: {header}")
+                    sys.exit(1)
+                key_positions.append(position)
+
+        if key_positions is None:
+            key_spec = FULL_ROW_KEY
+        else:
+            key_spec = 'keys:' + ','.join(clean_column_name(header[position]) for position in key_positions)
+
+        if previous_spec is not None and previous_spec != key_spec:
+            print(f"Error: store '{store_name}' was built with key '{previous_spec}', not '{key_spec}'.")
+            print("Use the same --keys as before or another --store.")
+            sys.exit(1)
+
+        quoting_style = csv.QUOTE_ALL if uses_quotes else csv.QUOTE_MINIMAL
+
+        with open(delta_path, 'w', newline='', encoding='utf-8') as outfile:
+            writer = csv.writer(outfile, quoting=quoting_style, delimiter=delimiter)
+            writer.writerow(header)
+
+            for row in reader:
+                if not row:
+                    continue
+                content_hash = row_hash(row)
+                if key_positions is None:
+                    key_hash = content_hash
+                else:
+                    key_hash = row_hash([value_at(row, i) for i in key_positions])
+
+                current_keys.append(key_hash)
+                current_contents.append(content_hash)
+
+                # A key may repeat (e.g. invoice lines); each stored row matches at most one row here
+                low = bisect_left(previous_keys, key_hash)
+                high = bisect_right(previous_keys, key_hash, low)
+                run_start = bisect_left(previous_contents, content_hash, low, high)
+                run_end = bisect_right(previous_contents, content_hash, run_start, high)
+                if run_start < run_end and matched[run_start] < run_end - run_start:
+                    matched[run_start] += 1
+                    continue
+                writer.writerow(row)
+
+    current_keys, current_contents = sorted_pairs(current_keys, current_contents)
+    unchanged, changed, added, removed = delta_counts(previous_keys, previous_contents,
+                                                      current_keys, current_contents)
+    save_store(pending_path, key_spec, current_keys, current_contents)
+
+    print(f"Delta processing complete:")
+    print(f"- New/changed rows: {delta_path}")
+    print(f"- Compared against: {store_path} ({len(previous_keys)} rows)")
+    print(f"- Pending store: {pending_path} ({len(current_keys)} rows)")
+    print(f"- Added: {added}")
+    print(f"- Changed: {changed}")
+    print(f"- Removed: {removed}")
+    print(f"- Unchanged (skipped): {unchanged}")
+    print("After the delta file is processed and imported, run row_delta_commit.py on this file")
+    print("so the next delta is computed against it.")
+
+if __name__ == "__main__":
+    args = sys.argv[2:]
+    options = {}
+    while args:
+        if args[0] == '--commit':
+            options['--commit'] = True
+            args = args[1:]
+        elif len(args) >= 2 and args[0] in ('--keys', '--store'):
+            options[args[0]] = args[1]
+            args = args[2:]
+        else:
+            break
+    if len(sys.argv) < 2 or args or ('--commit' in options and '--keys' in options):
+        print("Usage: python row_delta.py <file.csv> [--keys COL1,COL2] [--store NAME]")
+        print("       python row_delta.py <file.csv> --commit [--store NAME]")
+        sys.exit(1)
+    store_name = options.get('--store', 'default')
+    if '--commit' in options:
+        commit_store(sys.argv[1], store_name=store_name)
+    else:
+        key_columns = options['--keys'].split(',') if '--keys' in options else None
+        main(sys.argv[1], key_columns=key_columns, store_name=store_name)
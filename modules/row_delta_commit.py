@@ -0,0 +1,11 @@
+import sys
+from row_delta import commit_store
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        commit_store(sys.argv[1])
+    elif len(sys.argv) == 4 and sys.argv[2] == '--store':
+        commit_store(sys.argv[1], store_name=sys.argv[3])
+    else:
+        print("Usage: python row_delta_commit.py <file.csv> [--store NAME]")
+        sys.exit(1)
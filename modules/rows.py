@@ -0,0 +1,55 @@
+COLUMN_ALIASES = {
+    'ncm': ['ncm'],
+    'grupo': ['grupo', 'group'],
+    'sub_grupo': ['sub_grupo', 'subgrupo', 'sub_group', 'subgroup'],
+    'emissao': ['emissao'],
+    'vencimento': ['vencimento'],
+}
+
+def clean_column_name(field):
+    return field.strip('"').strip().lower()
+
+
+class Header:
+    """Column positions of a CSV header, resolved once per file.
+
+    Rows are the plain lists produced by csv.reader; modules look values up
+    by the positions found here instead of building a dict for every row.
+    """
+
+    __slots__ = ('fieldnames', 'positions')
+
+    def __init__(self, fieldnames):
+        self.fieldnames = list(fieldnames)
+        self.positions = {}
+        for position, field in enumerate(self.fieldnames):
+            self.positions.setdefault(clean_column_name(field), position)
+
+    def __len__(self):
+        return len(self.fieldnames)
+
+    def find(self, name):
+        """Position of a column by name or known alias, or None if missing."""
+        name = clean_column_name(name)
+        for alias in COLUMN_ALIASES.get(name, [name]):
+            if alias in self.positions:
+                return self.positions[alias]
+        return None
+
+    def find_all(self, names):
+        return [position for position in map(self.find, names) if position is not None]
+
+
+def iter_rows(reader, width):
+    """Yield rows from a csv.reader, skipping blank lines and padding short rows."""
+    for row in reader:
+        if not row:
+            continue
+        if len(row) < width:
+            row.extend([''] * (width - len(row)))
+        yield row
+
+def value_at(row, position):
+    if position is None or position >= len(row):
+        return ''
+    return row[position]
@@ -0,0 +1,153 @@
+import sys
+import csv
+import os
+import re
+import sqlite3
+
+BATCH_SIZE = 10000
+
+# WAL keeps the database intact if the process is killed mid-load (e.g. a cancelled job);
+# with synchronous OFF only a power loss can drop the last transactions
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -262144",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+
+def quote_identifier(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def table_name_for(name):
+    table = re.sub(r'\W', '_', name).strip('_')
+    return table or 'dados'
+
+def column_names(fieldnames):
+    columns = []
+    for position, field in enumerate(fieldnames, 1):
+        column = field.strip('"').strip("'").strip() or f"COLUNA_{position}"
+        while column.upper() in (existing.upper() for existing in columns):
+            column = f"{column}_{position}"
+        columns.append(column)
+    return columns
+
+def clean_fields(row):
+    return [field.strip() for field in row]
+
+def open_database(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in BULK_LOAD_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def create_table(conn, table, columns):
+    column_defs = ', '.join(f"{quote_identifier(column)} TEXT" for column in columns)
+    conn.execute(f"DROP TABLE IF EXISTS {quote_identifier(table)}")
+    conn.execute(f"CREATE TABLE {quote_identifier(table)} ({column_defs})")
+
+def bulk_load(conn, table, columns, rows, batch_size=BATCH_SIZE):
+    placeholders = ', '.join('?' * len(columns))
+    insert_sql = f"INSERT INTO {quote_identifier(table)} VALUES ({placeholders})"
+    loaded = 0
+    batch = []
+    conn.execute("BEGIN")
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            conn.executemany(insert_sql, batch)
+            loaded += len(batch)
+            batch = []
+    if batch:
+        conn.executemany(insert_sql, batch)
+        loaded += len(batch)
+    conn.execute("COMMIT")
+    return loaded
+
+def create_indexes(conn, table, columns, index_columns):
+    by_upper = {column.upper(): column for column in columns}
+    created = []
+    for requested in index_columns:
+        column = by_upper.get(requested.strip().upper())
+        if column is None:
+            print(f"Warning: index column '{requested}' not found, skipping")
+            continue
+        index_name = table_name_for(f"idx_{table}_{column}")
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS {quote_identifier(index_name)} "
+            f"ON {quote_identifier(table)} ({quote_identifier(column)})"
+        )
+        created.append(column)
+    return created
+
+def main(csv_path, index_columns=None):
+    if not os.path.exists(csv_path):
+        print(f"Error: File '{csv_path}' not found.")
+        sys.exit(1)
+
+    base_name = os.path.basename(csv_path)
+    name_without_ext = os.path.splitext(base_name)[0]
+
+    os.makedirs('./files', exist_ok=True)
+
+    db_path = f"./files/{name_without_ext}.sqlite"
+    table = table_name_for(name_without_ext)
+
+    with open(csv_path, 'r', encoding='utf-8', newline='') as infile:
+        first_line = infile.readline()
+        if ';' in first_line:
+            delimiter = ';'
+        elif ',' in first_line:
+            delimiter = ','
+        else:
+            delimiter = ','
+
+        print(f"Detected delimiter: '{delimiter}'")
+        infile.seek(0)
+
+        reader = csv.reader(infile, delimiter=delimiter)
+        header = next(reader, None)
+        if not header:
+            print("Error: CSV file does not contain a header row.")
+            sys.exit(1)
+
+        columns = column_names(header)
+        skipped_lines = []
+
+        def clean_rows():
+            for line_num, row in enumerate(reader, 2):
+                if not row:
+                    continue
+                if len(row) != len(columns):
+                    skipped_lines.append(line_num)
+                    continue
+                yield clean_fields(row)
+
+        conn = open_database(db_path)
+        try:
+            create_table(conn, table, columns)
+            loaded = bulk_load(conn, table, columns, clean_rows())
+            indexed = create_indexes(conn, table, columns, index_columns or [])
+        finally:
+            conn.close()
+
+    for line_num in skipped_lines:
+        print(f"Line {line_num}: Expected {len(columns)} columns, row skipped")
+
+    print(f"SQLite load complete:")
+    print(f"- Database: {db_path}")
+    print(f"- Table: {table} ({len(columns)} columns)")
+    print(f"- Rows loaded: {loaded}")
+    if skipped_lines:
+        print(f"- Rows skipped (wrong column count): {len(skipped_lines)}")
+    if indexed:
+        print(f"- Indexes created on: {', '.join(indexed)}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        main(sys.argv[1])
+    elif len(sys.argv) == 4 and sys.argv[2] == '--index':
+        main(sys.argv[1], index_columns=sys.argv[3].split(','))
+    else:
+        print("Usage: python sqlite_out.py <file.csv> [--index COL1,COL2]")
+        sys.exit(1)